@@ -2,8 +2,10 @@ import streamlit as st
 import pandas as pd
 import matplotlib.pyplot as plt
 import plotly.express as px
-import BaselineObj
-import MultiObjOpt_module
+from optimization_module import OptimizationPipeline, MODES, FACTOR_COLUMNS, results_to_frame
+import diff_module
+from dashboard_module import filter_results, downsample, scatter_figure, density_figure, page
+import ParetoOpt_module
 
 
 # Title and Description
@@ -26,6 +28,10 @@ freight_volume = {
 st.sidebar.subheader("Cost Constraints")
 max_cost_increase = st.sidebar.slider("Max Cost Increase Allowed (%)", min_value=0, max_value=100, value=20)
 
+# Trade-off Curves
+st.sidebar.subheader("Trade-off Curves")
+show_trade_off = st.sidebar.checkbox("Compute cost-vs-emissions trade-off curves", value=False)
+
 # Fuel Options by Mode
 st.sidebar.subheader("Select Fuels to Consider")
 all_fuels = [
@@ -108,104 +114,139 @@ ghg_data = st.sidebar.file_uploader("Upload Emissions CSV", type=["csv"], help="
 # Run Optimization Button
 if st.sidebar.button("Run Optimization"):
     try:
-        # Load user-provided or default datasets
-        if prices_data is not None and ghg_data is not None:
-            df_prices = pd.read_csv(prices_data)
-            df_ghg = pd.read_csv(ghg_data)
-        else:
-            st.write("**Reading CSV files**")
-            df_prices = pd.read_csv("Data/public.task_4.fuels_prices.csv")
-            df_ghg = pd.read_csv("Data/public.task_4.fuels_lca_ghg.csv")
+        LHV = edited_LHV.to_dict()
+        RHO = edited_RHO.to_dict()
+        fuel_consumption = edited_fuel_consumption.to_dict()
+
+        # Reuse the loaded data, baseline and coefficients of the previous run when only the cost cap changed
+        pipeline_key = repr((
+            getattr(prices_data, "file_id", None), getattr(ghg_data, "file_id", None),
+            LHV, RHO, fuel_consumption, freight_volume, mode_fuel_options
+        ))
+        if st.session_state.get("pipeline_key") != pipeline_key:
+            # Load user-provided or default datasets
+            if prices_data is not None and ghg_data is not None:
+                df_prices = pd.read_csv(prices_data)
+                df_ghg = pd.read_csv(ghg_data)
+            else:
+                st.write("**Reading CSV files**")
+                df_prices = pd.read_csv("Data/public.task_4.fuels_prices.csv")
+                df_ghg = pd.read_csv("Data/public.task_4.fuels_lca_ghg.csv")
+            st.session_state["pipeline"] = OptimizationPipeline(df_prices, df_ghg, LHV, RHO, fuel_consumption, freight_volume, mode_fuel_options)
+            st.session_state["pipeline_key"] = pipeline_key
+        pipeline = st.session_state["pipeline"]
 
         # Baseline Calculation
         st.write("**Calculating Baseline...**")
-         # Call the baseline logic of petroleum diesel (assumes BaselineObj.Run exists)
-        BaselineOutputs = BaselineObj.Run(df_prices, df_ghg, edited_LHV.to_dict(), edited_RHO.to_dict(), edited_fuel_consumption.to_dict(), freight_volume)
-        # The output from BaselineObj includes baseline prices and GHG emissions for highway, rail, and maritime
-        highway_base_prices, rail_base_prices, maritime_base_prices, highway_base_ghg, rail_base_ghg, maritime_base_ghg = BaselineOutputs
-
-        # Run Optimization for Highway
-        st.write("**Running Optimization for Highway...**")
-        highway_results = MultiObjOpt_module.Run(
-            df_prices, df_ghg, highway_base_prices, highway_base_ghg,
-            edited_LHV.to_dict(), edited_RHO.to_dict(), freight_volume,
-            edited_fuel_consumption.to_dict(), max_cost_increase, "Highway", mode_fuel_options
-        )
-
-        # Run Optimization for Rail
-        st.write("**Running Optimization for Rail...**")
-        rail_results = MultiObjOpt_module.Run(
-            df_prices, df_ghg, rail_base_prices, rail_base_ghg,
-            edited_LHV.to_dict(), edited_RHO.to_dict(), freight_volume,
-            edited_fuel_consumption.to_dict(), max_cost_increase, "Rail", mode_fuel_options
-        )
-
-        # Run Optimization for Maritime
-        st.write("**Running Optimization for Maritime...**")
-        maritime_results = MultiObjOpt_module.Run(
-            df_prices, df_ghg, maritime_base_prices, maritime_base_ghg,
-            edited_LHV.to_dict(), edited_RHO.to_dict(), freight_volume,
-            edited_fuel_consumption.to_dict(), max_cost_increase, "Maritime", mode_fuel_options
-        )
+        pipeline.baseline()
+
+        # Run Optimization for each mode
+        mode_results = {}
+        for mode in MODES:
+            st.write(f"**Running Optimization for {mode}...**")
+            mode_results[mode] = pipeline.run(mode, max_cost_increase)
+            stats = pipeline.solve_stats[(mode, max_cost_increase)]
+            st.write(f"{stats['unique_problems']} unique problems for {stats['scenarios']} scenarios "
+                     f"({stats['solves_saved']} solves saved)")
 
         # Display Results
         st.success("Optimization Complete!")
-        st.header("Optimization Results")
-
-       # Prepare a consolidated DataFrame of results for all modes
-        # Flatten allocations and add to results DataFrame
-        scenarios_data = []
-
-        # Example: Iterate through highway, rail, and maritime results
-        for mode, results in [
-            ("Highway", highway_results),
-            ("Rail", rail_results),
-            ("Maritime", maritime_results)
-        ]:
-            for scenario, result in results.items():
-                if result["allocations"] is not None:
-                    # Create a dictionary representing the row for this scenario
-                    row = {
-                        "Mode": mode,
-                        "Scenario": scenario,
-                        "Percent GHG Change": result["percent_ghg"],
-                        "Percent Cost Change": result["percent_cost"].item()
-                    }
-                    
-                    # Add individual allocation values (e.g., 'Diesel', 'Hydrogen', etc.) as columns
-                    for fuel, allocation in result["allocations"].items():
-                        row[f"Allocation ({fuel})"] = allocation
-                    
-                    scenarios_data.append(row)
-
-        # Convert to DataFrame
-        results_df = pd.DataFrame(scenarios_data)
-
-        # Separate Scatter Plots for Each Mode
-        modes = ["Highway", "Rail", "Maritime"]
-
-        for mode in modes:
+
+        # Keep the flattened results so filters and table pages can change without re-running the optimization
+        st.session_state["results_df"] = results_to_frame(mode_results, pipeline.df_prices)
+        st.session_state["results_csv"] = st.session_state["results_df"].to_csv(index=False).encode()
+        st.session_state.pop("diff", None)
+
+    except Exception as e:
+        st.error(f"Error during optimization: {e}")
+
+if "results_df" in st.session_state:
+    results_df = st.session_state["results_df"]
+    pipeline = st.session_state["pipeline"]
+    st.header("Optimization Results")
+    try:
+        # Filter results by the GCAM scenario factors
+        with st.expander("Filter by GCAM scenario factors"):
+            filters = {
+                col: st.multiselect(col, options=sorted(results_df[col].dropna().unique()))
+                for col in FACTOR_COLUMNS if col in results_df.columns
+            }
+        filtered_df = filter_results(results_df, filters)
+        solved_df = filtered_df[filtered_df["Status"] == "solved"]
+
+        # Plots are aggregated or downsampled on the server so large result sets stay responsive
+        view = st.radio("Plot type", ["Auto", "Scatter", "Density"], horizontal=True,
+                        help="Auto shows a density heatmap when a mode has more results than the point limit")
+        max_points = st.number_input("Maximum points per scatter plot", min_value=100, value=5000, step=500)
+
+        # Separate Plots for Each Mode
+        for mode in MODES:
             st.subheader(f"Scatter Plot: {mode} - Emissions Change vs Cost Change")
-            st.write(f"This scatter plot shows the trade-off between emission changes and cost changes for all scenarios in the {mode} mode.")
-            
+            st.write(f"This plot shows the trade-off between emission changes and cost changes for all scenarios in the {mode} mode.")
+
             # Filter data for the current mode
-            mode_data = results_df[results_df["Mode"] == mode]
-            allocation_columns = [col for col in mode_data.columns if "Allocation" in col]
-            # Create scatter plot
-            fig = px.scatter(
-                mode_data,
-                x="Percent GHG Change",
-                y="Percent Cost Change",
-                #text="Scenario",  # Show scenario names on hover
-                hover_data=["Scenario"] + allocation_columns,  # Add additional data fields
-                title=f"{mode} Mode: Emissions vs Cost Changes",
-                labels={"Percent GHG Change": "Emissions Change (%)", "Percent Cost Change": "Cost Change (%)"},
-                template="plotly_white"
-            )
-            fig.update_traces(marker=dict(size=10, opacity=0.8), textposition="top center")
-            
-            # Display the scatter plot in Streamlit
+            mode_data = solved_df[solved_df["Mode"] == mode]
+            if mode_data.empty:
+                st.write("No solved scenarios match the filters.")
+                continue
+
+            if view == "Density" or (view == "Auto" and len(mode_data) > max_points):
+                fig = density_figure(mode_data, mode)
+            else:
+                fig = scatter_figure(mode_data, mode, max_points)
+
+            # Display the plot in Streamlit
             st.plotly_chart(fig)
 
+            if show_trade_off:
+                st.subheader(f"Trade-off Curves: {mode} - Emissions Change vs Cost Change")
+                st.write("Each line is the set of nondominated allocations of a scenario, from the cheapest to the lowest-emission allocation.")
+                curves = ParetoOpt_module.to_frame(pipeline.run_pareto(mode), mode)
+                if not curves.empty:
+                    # Draw about max_points vertices in total
+                    vertices_per_curve = max(1, round(len(curves) / curves["Scenario"].nunique()))
+                    shown_scenarios = downsample(mode_data, max(1, max_points // vertices_per_curve))["Scenario"]
+                    curves = curves[curves["Scenario"].isin(shown_scenarios)]
+                if not curves.empty:
+                    fig = px.line(
+                        curves,
+                        x="Percent GHG Change",
+                        y="Percent Cost Change",
+                        line_group="Scenario",
+                        hover_data=["Scenario"] + [col for col in curves.columns if "Allocation" in col],
+                        markers=True,
+                        title=f"{mode} Mode: Emissions vs Cost Trade-off",
+                        labels={"Percent GHG Change": "Emissions Change (%)", "Percent Cost Change": "Cost Change (%)"},
+                        template="plotly_white"
+                    )
+                    st.plotly_chart(fig)
+
+        # Paginated results table; only the rows of the current page are sent to the browser
+        st.subheader("Results Table")
+        page_size = st.selectbox("Rows per page", [50, 100, 500, 1000], index=1)
+        page_number = st.number_input("Page", min_value=1, value=1, step=1)
+        rows, n_pages = page(filtered_df, page_number, page_size)
+        st.caption(f"Page {min(page_number, n_pages)} of {n_pages} ({len(filtered_df)} results)")
+        st.dataframe(rows)
+
+        st.download_button("Download Results CSV", data=st.session_state["results_csv"], file_name="results.csv", mime="text/csv")
+
+        # Compare with the results of a previous run, e.g. after changing the LHV/RHO/FC tables or the price file
+        st.subheader("Compare with Previous Results")
+        previous_results = st.file_uploader("Upload a previous Results CSV", type=["csv"], help="Results downloaded from an earlier run")
+        if previous_results is not None:
+            # Compare once per uploaded file and run; page changes reuse the stored comparison
+            if st.session_state.get("diff", (None,))[0] != previous_results.file_id:
+                diff_df = diff_module.compare(pd.read_csv(previous_results), results_df)
+                st.session_state["diff"] = (previous_results.file_id, diff_module.summarize(diff_df), diff_df[diff_df["Changed"]])
+            _, diff_summary, changed_df = st.session_state["diff"]
+            st.dataframe(diff_summary)
+            if changed_df.empty:
+                st.success("No scenario changed.")
+            else:
+                diff_page_number = st.number_input("Changed scenarios page", min_value=1, value=1, step=1)
+                rows, n_pages = page(changed_df, diff_page_number, page_size)
+                st.caption(f"Page {min(diff_page_number, n_pages)} of {n_pages} ({len(changed_df)} changed results)")
+                st.dataframe(rows)
     except Exception as e:
-        st.error(f"Error during optimization: {e}")
+        st.error(f"Error displaying results: {e}")
@@ -0,0 +1,207 @@
+from pyomo.environ import *
+from concurrent.futures import ProcessPoolExecutor
+import os
+import MultiObjOpt_module
+
+# Option names of the supported open-source MILP solvers for the time limit (s), relative MIP gap and threads
+SOLVER_OPTIONS = {
+    "cbc": {"time_limit": "seconds", "mip_gap": "ratioGap", "threads": "threads"},
+    "appsi_highs": {"time_limit": "time_limit", "mip_gap": "mip_rel_gap", "threads": "threads"},
+}
+
+# Termination conditions that may still come with a usable (feasible, possibly suboptimal) solution
+LIMIT_CONDITIONS = [TerminationCondition.maxTimeLimit, TerminationCondition.maxIterations, TerminationCondition.feasible]
+
+# Distance from 0 or 1 within which an adoption variable counts as integer
+INTEGER_TOLERANCE = 1e-6
+
+
+def build_milp_model(fuel_costs, fuel_ghg, max_cost, min_deployment=0.0, max_fuels=None, fixed_costs=None):
+    """
+    Extend the allocation model of MultiObjOpt_module with binary fuel adoption variables.
+
+    Args:
+        fuel_costs (dict): Cost coefficient ($B) of each fuel.
+        fuel_ghg (dict): GHG coefficient (Million KgCO2eq) of each fuel.
+        max_cost (float): Upper limit on total system cost ($B), including fixed costs of adopted fuels.
+        min_deployment (float or dict): Minimum allocation share of an adopted fuel (per fuel if a dict).
+        max_fuels (int): Maximum number of adopted fuels, or None for no limit.
+        fixed_costs (dict): Fixed infrastructure cost ($B) of adopting each fuel; missing fuels cost nothing.
+
+    Returns:
+        ConcreteModel: The allocation model.
+    """
+    model = MultiObjOpt_module.build_model(fuel_costs, fuel_ghg, max_cost)
+
+    if not isinstance(min_deployment, dict):
+        min_deployment = {f: min_deployment for f in fuel_costs}
+    fixed_costs = fixed_costs or {}
+
+    model.min_deployment = Param(model.fuels, initialize={f: float(min_deployment.get(f, 0.0)) for f in fuel_costs})
+    model.fixed_cost = Param(model.fuels, initialize={f: float(fixed_costs.get(f, 0.0)) for f in fuel_costs})
+
+    # Variables: Whether each fuel is adopted
+    model.adopted = Var(model.fuels, within=Binary)
+
+    # Constraint: Only adopted fuels get an allocation, and at least their minimum deployment
+    def adoption_upper_rule(model, f):
+        return model.allocation[f] <= model.adopted[f]
+    model.adoption_upper = Constraint(model.fuels, rule=adoption_upper_rule)
+
+    def adoption_lower_rule(model, f):
+        return model.allocation[f] >= model.min_deployment[f] * model.adopted[f]
+    model.adoption_lower = Constraint(model.fuels, rule=adoption_lower_rule)
+
+    # Constraint: At most max_fuels fuels per mode
+    if max_fuels is not None:
+        def max_fuels_rule(model):
+            return sum(model.adopted[f] for f in model.fuels) <= max_fuels
+        model.max_fuels = Constraint(rule=max_fuels_rule)
+
+    # Constraint: Total cost, including fixed costs of adopted fuels, below the cost cap
+    model.cost_increase.deactivate()
+    def total_cost_rule(model):
+        return sum(model.cost[f] * model.allocation[f] + model.fixed_cost[f] * model.adopted[f] for f in model.fuels) <= max_cost
+    model.total_cost = Constraint(rule=total_cost_rule)
+
+    return model
+
+
+def solve_problem(fuel_costs, fuel_ghg, max_cost, min_deployment=0.0, max_fuels=None, fixed_costs=None,
+                  solver_name="cbc", time_limit=60, mip_gap=0.01, threads=None):
+    """
+    Build and solve one MILP allocation problem within the given time and gap limits.
+
+    Returns:
+        dict: allocations, adopted fuels, total GHG, total cost and solver termination condition.
+              allocations is None when no integer-feasible solution was found.
+    """
+    model = build_milp_model(fuel_costs, fuel_ghg, max_cost, min_deployment, max_fuels, fixed_costs)
+
+    solver = SolverFactory(solver_name)
+    option_names = SOLVER_OPTIONS[solver_name]
+    for option, setting in (("time_limit", time_limit), ("mip_gap", mip_gap), ("threads", threads)):
+        if setting is not None:
+            solver.options[option_names[option]] = setting
+
+    result = solver.solve(model, load_solutions=False)
+    condition = result.solver.termination_condition
+
+    if condition == TerminationCondition.optimal or (condition in LIMIT_CONDITIONS and len(result.solution) > 0):
+        model.solutions.load_from(result)
+    integer_feasible = all(
+        model.adopted[f].value is not None and min(abs(model.adopted[f].value), abs(1 - model.adopted[f].value)) <= INTEGER_TOLERANCE
+        for f in model.fuels
+    )
+    if integer_feasible:
+        return {
+            "allocations": {f: model.allocation[f].value for f in model.fuels},
+            "adopted": [f for f in model.fuels if model.adopted[f].value > 0.5],
+            "ghg": value(model.objective),
+            "total_cost": value(sum(model.cost[f] * model.allocation[f] + model.fixed_cost[f] * model.adopted[f] for f in model.fuels)),
+            "status": str(condition),
+        }
+    return {"allocations": None, "adopted": None, "ghg": None, "total_cost": None, "status": str(condition)}
+
+
+def solve_coefficients(coefficients, baseline_cost, baseline_ghg, max_cost_incrase, min_deployment=0.0, max_fuels=None,
+                       fixed_costs=None, solver_name="cbc", time_limit=60, mip_gap=0.01, threads=None, n_jobs=1, stats=None):
+    """
+    Solve the MILP allocation problem of every scenario from precomputed coefficients. Each distinct
+    problem is solved once; with n_jobs > 1 the distinct problems are solved in parallel processes.
+
+    Args:
+        coefficients (dict): Output of MultiObjOpt_module.build_coefficients.
+        baseline_cost (dict): The baseline fuel cost used for comparison against reporting_fuel=petroleum diesel.
+        baseline_ghg (dict): The baseline emissions for comparison against reporting_fuel=petroleum diesel
+        max_cost_incrase (float): upper limit on total system cost increase (%)
+        min_deployment, max_fuels, fixed_costs: See build_milp_model.
+        solver_name (str): "cbc" or "appsi_highs".
+        time_limit (float): Solver time limit per scenario (s).
+        mip_gap (float): Relative MIP gap at which a scenario is considered solved.
+        threads (int): Solver threads per scenario; None uses the cores left per parallel scenario
+                       (os.cpu_count() // n_jobs, at least 1), 1 disables multi-threading.
+        n_jobs (int): Number of scenarios solved in parallel.
+        stats (dict): Optional dictionary filled with the number of scenarios, unique problems and solves saved.
+
+    Returns:
+        dict: A dictionary containing optimized allocations, adopted fuels, emissions, costs and solver status for each scenario.
+    """
+    # Group scenarios by problem so each distinct problem is solved once
+    groups = MultiObjOpt_module.group_scenarios(coefficients, baseline_cost, baseline_ghg)
+
+    problems = []
+    for scenarios in groups.values():
+        fuel_costs, fuel_ghg = coefficients[scenarios[0]]
+        problems.append((fuel_costs, fuel_ghg, (1+ (max_cost_incrase/100)) * baseline_cost[scenarios[0]]))
+    # Share the cores between the scenarios solved in parallel
+    if threads is None:
+        threads = max(1, (os.cpu_count() or 1) // max(1, n_jobs))
+    options = dict(min_deployment=min_deployment, max_fuels=max_fuels, fixed_costs=fixed_costs,
+                   solver_name=solver_name, time_limit=time_limit, mip_gap=mip_gap, threads=threads)
+
+    if n_jobs > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            futures = [executor.submit(solve_problem, *problem, **options) for problem in problems]
+            solutions = [future.result() for future in futures]
+    else:
+        solutions = [solve_problem(*problem, **options) for problem in problems]
+
+    # Initialize results dictionary
+    results = {}
+    for scenarios, solution in zip(groups.values(), solutions):
+        for scenario in scenarios:
+            if solution["allocations"] is not None:
+                print(f"Optimization succeded for scenario: {scenario} ({solution['status']})")
+                results[scenario] = {
+                    "allocations": dict(solution["allocations"]),
+                    "adopted": list(solution["adopted"]),
+                    "percent_ghg": ((solution["ghg"]/baseline_ghg[scenario])-1)*100, # convert to percentage change
+                    "percent_cost": ((solution["total_cost"]/baseline_cost[scenario])-1)*100, # convert to percentage change
+                    "status": solution["status"],
+                }
+            else:
+                print(f"Optimization failed for scenario: {scenario} ({solution['status']})")
+                results[scenario] = {"allocations": None, "adopted": None, "percent_ghg": None, "percent_cost": None, "status": solution["status"]}
+
+    solves_saved = len(coefficients) - len(groups)
+    print(f"Solved {len(groups)} unique problems for {len(coefficients)} scenarios ({solves_saved} solves saved)")
+    if stats is not None:
+        stats.update(scenarios=len(coefficients), unique_problems=len(groups), solves_saved=solves_saved)
+
+    # Keep the scenario order of the input data
+    return {scenario: results[scenario] for scenario in coefficients}
+
+
+def Run(df_prices, df_ghg, baseline_cost, baseline_ghg, LHV, RHO, freight_volume, fuel_consumption, max_cost_incrase, mode, mode_fuel_options,
+        min_deployment=0.0, max_fuels=None, fixed_costs=None, solver_name="cbc", time_limit=60, mip_gap=0.01, threads=None, n_jobs=1):
+
+    """
+    Mixed-integer variant of MultiObjOpt_module.Run: minimize the total fuel emissions of the freight sector
+    while keeping costs below max_cost_incrase relative to the baseline case, with binary fuel adoption,
+    minimum deployment thresholds, at most max_fuels fuels per mode and fixed infrastructure costs per adopted fuel.
+    With n_jobs > 1, call it under an `if __name__ == "__main__":` guard on platforms that spawn processes.
+
+    Args:
+        df_prices (pd.DataFrame): The input fuel price data containing fuel costs for different scenarios.
+        df_ghg (pd.DataFrame): The input fuel ghg emissions data containing emissions for different scenarios
+        baseline_cost (dict): The baseline fuel cost used for comparison against reporting_fuel=petroleum diesel.
+        baseline_ghg (dict): The baseline emissions for comparison against reporting_fuel=petroleum diesel
+        LHV (dict): Lower heating values of fuels.
+        RHO (dict): Density of fuels.
+        freight_volume (dict): Freight volume split.
+        fuel_consumption (dict): Fuel consumption profile (in G/mile).
+        max_cost_increase : upper limit on total system cost increase
+        mode (str): Transportation mode ("Highway", "Rail", "Maritime").
+        mode_fuel_options (dict): which fuels to consider for allocation
+        min_deployment, max_fuels, fixed_costs, solver_name, time_limit, mip_gap, threads, n_jobs: See solve_coefficients.
+
+    Returns:
+        dict: A dictionary containing optimized allocations, adopted fuels, emissions, costs and solver status for each scenario.
+    """
+    coefficients = MultiObjOpt_module.build_coefficients(df_prices, df_ghg, LHV, RHO, freight_volume, fuel_consumption, mode, mode_fuel_options)
+
+    return solve_coefficients(coefficients, baseline_cost, baseline_ghg, max_cost_incrase, min_deployment, max_fuels, fixed_costs,
+                              solver_name, time_limit, mip_gap, threads, n_jobs)
+
+# end code
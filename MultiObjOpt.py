@@ -1,15 +1,11 @@
-import pandas as pd
-from pyomo.environ import *
+import argparse
 
-import BaselineObj
+from optimization_module import OptimizationPipeline, MODES, results_to_frame
+import diff_module
 
-# Load the CSV prices file into a DataFrame
-file_path = 'Data/public.task_4.fuels_prices.csv' 
-df_prices = pd.read_csv(file_path)
-
-# Load the CSV emissions file into a DataFrame
-file_path = 'Data/public.task_4.fuels_lca_ghg.csv' 
-df_ghg = pd.read_csv(file_path)
+# CSV prices and emissions files
+PRICES_PATH = 'Data/public.task_4.fuels_prices.csv'
+GHG_PATH = 'Data/public.task_4.fuels_lca_ghg.csv'
 
 # Total freight volume 2050 (Billion ton-miles)
 freight_volume = {
@@ -103,152 +99,20 @@ RHO = {
         "LNG": 1.89,
     }
 }
-# Calculate prices and emissions for the baseline 2050 case (fuel=petroleum diesel)
-BaselineOutputs = BaselineObj.Run(df_prices, df_ghg, LHV, RHO, fuel_consumption, freight_volume)
-
-(highway_base_prices, rail_base_prices, maritime_base_prices, highway_base_ghg, rail_base_ghg, maritime_base_ghg) = BaselineOutputs
-
-# Display the extracted baseline prices grouped by scenario for highway
-for scenario, prices in highway_base_prices.items():
-    print(f"Scenario: {scenario}, Highway_Prices: {prices}")
-
-# Display the extracted baseline prices grouped by scenario for Rail
-for scenario, prices in rail_base_prices.items():
-    print(f"Scenario: {scenario}, Rail_Prices: {prices}")
-
-# Display the extracted baseline prices grouped by scenario for Maritime
-for scenario, prices in maritime_base_prices.items():
-    print(f"Scenario: {scenario}, Maritime_Prices: {prices}")
-
-# Display the extracted baseline emissions grouped by scenario for highway
-for scenario, ghg in highway_base_ghg.items():
-    print(f"Scenario: {scenario}, Highway_GHG: {ghg}")
-
-# Display the extracted baseline emissions grouped by scenario for Rail
-for scenario, ghg in rail_base_ghg.items():
-    print(f"Scenario: {scenario}, Rail_GHG: {ghg}")
-
-# Display the extracted baseline emissions grouped by scenario for Maritime
-for scenario, ghg in maritime_base_ghg.items():
-    print(f"Scenario: {scenario}, Maritime_GHG: {ghg}")
-
-
-def optimize_fuel_allocation(dframe_prices, dframe_ghg, baseline_cost, baseline_ghg, LHV, RHO, freight_volume, fuel_consumption, mode):
-    """
-    Optimize the allocation of freight volume to different reporting fuels using Pyomo 
-    to minimize the total fuel emissions of the freight sector, while keeping costs <20% increase relative to the baseline case.
-
-    Args:
-        dframe_prices (pd.DataFrame): The input fuel price data containing fuel costs for different scenarios.
-        dframe_ghg (pd.DataFrame): The input fuel ghg emissions data containing emissions for different scenarios
-        baseline_cost (pd.DataFrame): The baseline fuel cost used for comparison against reporting_fuel=petroleum diesel.
-        baseline_ghg (pd.DataFrame): The baseline emissions for comparison against reporting_fuel=petroleum diesel
-
-    Returns:
-        dict: A dictionary containing optimized allocations, emissions, and costs for each scenario.
-    """
-    # Filter the DataFrame for Year = 2050
-    filtered_df_prices = dframe_prices[(dframe_prices['year'] == 2050)]
-    filtered_df_ghg = dframe_ghg[(dframe_ghg['year'] == 2050)]
-
-    # Initialize results dictionary
-    results = {}
-
-    print(len(filtered_df_prices['scenario'].unique()))
-    unique_scenarios = filtered_df_prices['scenario'].unique() # unique scenarios
 
-    # Loop through each unique scenario in the filtered DataFrame
-    for scenario in unique_scenarios:
-        # Extract the rows corresponding to the current scenario
-        # Remove Ammonia for Highway and Rail, remove different fuels for maritime
-        if mode == "Highway" or mode == "Rail":
-            scenario_df_prices = filtered_df_prices[(filtered_df_prices['scenario'] == scenario) & (~filtered_df_prices['reporting_fuel'].isin(['ammonia']))]
-            scenario_df_ghg = filtered_df_ghg[(filtered_df_ghg['scenario'] == scenario) & (~filtered_df_ghg['fuel'].isin(['ammonia']))]
-        else:
-            scenario_df_prices = filtered_df_prices[(filtered_df_prices['scenario'] == scenario) & (~filtered_df_prices['reporting_fuel'].isin(['e-diesel', 'electricity', 'FT biofuels', 'FT biofuels CCS', 'renewable diesel']))]
-            scenario_df_ghg = filtered_df_ghg[(filtered_df_ghg['scenario'] == scenario) & (~filtered_df_ghg['fuel'].isin(['e-diesel', 'electricity', 'FT biofuels', 'FT biofuels CCS', 'renewable diesel']))]
-
-        # Define the optimization model
-        model = ConcreteModel()
-
-        # Sets: Reporting fuels
-        reporting_fuels = scenario_df_prices['reporting_fuel'].to_list()
-        
-        model.fuels = Set(initialize=reporting_fuels)
-
-        # Parameters: fuel costs and ghg emissions
-        gcam_fuel_costs = scenario_df_prices[['reporting_fuel','price_USDperGJ']]
-        fuel_costs = {}
-        for fuels in reporting_fuels:
-            if mode=="Highway":
-                fuel_costs[fuels] = gcam_fuel_costs[gcam_fuel_costs['reporting_fuel'] == fuels]['price_USDperGJ'].values * float(fuel_consumption['Highway'][fuels]) * (float(LHV['Highway'][fuels])/1000)*float(freight_volume['Highway'])
-            elif mode=="Rail":
-                fuel_costs[fuels] = gcam_fuel_costs[gcam_fuel_costs['reporting_fuel'] == fuels]['price_USDperGJ'].values * float(fuel_consumption['Rail'][fuels]) * (float(LHV['Rail'][fuels])/1000)*float(freight_volume['Rail'])
-            elif mode=="Maritime":
-                fuel_prices = gcam_fuel_costs[gcam_fuel_costs['reporting_fuel'] == fuels]['price_USDperGJ'].values * float(RHO['Maritime'][fuels]) * (float(LHV['Maritime'][fuels])/1000)
-                fuel_costs[fuels] = 0.01*(2.636e-2 * fuel_prices + 8.841e-3 * 27.34 + 4.47e-6 * 287331 + 1.0411) * float(freight_volume['Maritime'])
-            else:
-                print(f"Fuel cost allocation failed for scenario: {scenario}")
-            
-        model.cost = Param(model.fuels, initialize=dict(zip(reporting_fuels, fuel_costs.values())))
-        fuel_ghg_df = {}
-        for fuels in reporting_fuels:
-            fuel_ghg_df[fuels] = scenario_df_ghg[scenario_df_ghg['fuel'] == fuels]['kgCO2e_GJ'].sum()
-
-        #gcam_fuel_ghg = list(fuel_ghg_df.values())
-        fuel_ghg = {}
-        for fuels in reporting_fuels:
-            if mode=="Highway":
-                fuel_ghg[fuels] = fuel_ghg_df[fuels] * (float(LHV['Highway'][fuels])/1000) * float(fuel_consumption['Highway'][fuels]) * float(freight_volume['Highway']) #Million KgCO2eq
-            elif mode=="Rail":
-                fuel_ghg[fuels] = fuel_ghg_df[fuels] * (float(LHV['Rail'][fuels])/1000) * float(fuel_consumption['Rail'][fuels]) * float(freight_volume['Rail']) #Million KgCO2eq
-            elif mode=="Maritime":
-                fuel_ghg[fuels] = fuel_ghg_df[fuels] * (float(LHV['Maritime'][fuels])/1000) * (float(fuel_consumption['Maritime'][fuels])/1000) * float(freight_volume['Maritime']) #Million KgCO2eq
-            else:
-                print(f"Fuel ghg allocation failed for scenario: {scenario}")
-
-        model.ghg = Param(model.fuels, initialize=dict(zip(reporting_fuels, fuel_ghg.values())))   
-    
-        # Variables: Fraction of freight volume allocated to each fuel
-        model.allocation = Var(model.fuels, bounds=(0,1))
-
-        # Objective: Minimize relative total fuel ghg
-        def objective_rule(model):
-            return sum(model.ghg[f] * model.allocation[f] for f in model.fuels)
-        model.objective = Objective(rule=objective_rule, sense=minimize)
-
-        # Constraint: Total allocation must sum to 100% of freight volume
-        def total_allocation_constraint(model):
-            return sum(model.allocation[f] for f in model.fuels) ==1
-        model.total_allocation = Constraint(rule=total_allocation_constraint)
-
-        # Constraint: Total cost increase < 20% from baseline cost of diesel
-        def total_cost_increase(model):
-            return sum(model.cost[f] * model.allocation[f] for f in model.fuels) <= (1+ (20/100))  * baseline_cost[scenario]
-        model.cost_increase = Constraint(rule=total_cost_increase)
-
-        # Solve the optimization problem
-        solver = SolverFactory('glpk') # Use GLPK solver; replace with 'gurobi' if available
-        result = solver.solve(model)
+# Fuels to consider for allocation in each mode
+mode_fuel_options = {
+    # Highway fuel options: (a) e-diesel (b) electricity (c) FT biofuels (d) FT biofuels CCS (e) hydrogen (f) LNG (g) Diesel (h) renewable diesel
+    "Highway": ["petroleum diesel", "e-diesel", "electricity", "FT biofuels", "FT biofuels CCS", "hydrogen", "LNG", "renewable diesel"],
+    # Rail fuel options: (a) e-diesel (b) electricity (c) FT biofuels (d) FT biofuels CCS (e) hydrogen (f) LNG (g) Diesel (h) renewable diesel
+    "Rail": ["petroleum diesel", "e-diesel", "electricity", "FT biofuels", "FT biofuels CCS", "hydrogen", "LNG", "renewable diesel"],
+    # Maritime fuel options: Hydrogen (f) LNG (g) Diesel (h) Ammonia
+    "Maritime": ["petroleum diesel", "hydrogen", "LNG", "ammonia"],
+}
 
-        if result.solver.status == SolverStatus.ok and result.solver.termination_condition == TerminationCondition.optimal:
-            # Extract optimized allocations
-            print(f"Optimization succeded for scenario: {scenario}")
-            allocations = {f: model.allocation[f].value for f in reporting_fuels}
-            minimized_ghg = model.objective()
-            total_cost = sum(model.allocation[f].value * model.cost[f] for f in reporting_fuels)
+# Upper limit on total system cost increase relative to the baseline case (%)
+max_cost_increase = 20
 
-            # Store results
-            results[scenario] = {
-                "allocations": allocations,
-                "percent_ghg": ((minimized_ghg/baseline_ghg[scenario])-1)*100, # convert to percentage change
-                "percent_cost": ((total_cost/baseline_cost[scenario])-1)*100 # convert to percentage change
-            }
-        else:
-            print(f"Optimization failed for scenario: {scenario}")
-            results[scenario] = {"allocations": None, "percent_ghg": None, "percent_cost": None}
-    
-    return results
 
 # Function to nicely print the optimization results
 def print_optimized_results(output_dict, mode):
@@ -266,29 +130,46 @@ def print_optimized_results(output_dict, mode):
         if result["allocations"] is not None:
             print(f"  Fuel Allocations: {result['allocations']}")
             print(f"  Percent GHG Change: {result['percent_ghg']:.2f}")
-            print(f"  Percent Cost Change: {float(result['percent_cost'][0]):.2f}")
+            print(f"  Percent Cost Change: {float(result['percent_cost']):.2f}")
         else:
             print("  Optimization failed for this scenario.")
         print("-" * 50)
 
 
-# Optimize fuel deployment for highway (year 2050)
-highway_outputs = optimize_fuel_allocation(df_prices, df_ghg, highway_base_prices, highway_base_ghg, LHV, RHO, freight_volume, fuel_consumption, "Highway")
-#Highway fuel options: (a) e-diesel (b) electricity (c) FT biofuels (d) FT biofuels CCS (e) hydrogen (f) LNG (g) Diesel (h) renewable diesel
+def main():
+    parser = argparse.ArgumentParser(description="Optimize 2050 freight fuel allocations for every GCAM scenario.")
+    parser.add_argument("--output", help="Save the results table to this CSV file (see diff_module to compare runs)")
+    parser.add_argument("--baseline-output", help="Save the baseline table to this CSV file")
+    args = parser.parse_args()
+
+    # Load the CSV prices and emissions files
+    pipeline = OptimizationPipeline.from_csv(PRICES_PATH, GHG_PATH, LHV, RHO, fuel_consumption, freight_volume, mode_fuel_options)
+
+    # Calculate prices and emissions for the baseline 2050 case (fuel=petroleum diesel)
+    baseline = pipeline.baseline()
+
+    # Display the extracted baseline prices and emissions grouped by scenario for each mode
+    for mode in MODES:
+        for scenario, prices in baseline[mode][0].items():
+            print(f"Scenario: {scenario}, {mode}_Prices: {prices}")
+    for mode in MODES:
+        for scenario, ghg in baseline[mode][1].items():
+            print(f"Scenario: {scenario}, {mode}_GHG: {ghg}")
 
-#Optimize fuel deployment for Rail (year 2050)
-rail_outputs = optimize_fuel_allocation(df_prices, df_ghg, rail_base_prices, rail_base_ghg, LHV, RHO, freight_volume, fuel_consumption, "Rail")
-#Rail fuel options: (a) e-diesel (b) electricity (c) FT biofuels (d) FT biofuels CCS (e) hydrogen (f) LNG (g) Diesel (h) renewable diesel
+    # Optimize fuel deployment for each mode (year 2050)
+    outputs = pipeline.run_all(max_cost_increase)
 
-# Optimize fuel deployment for Maritime (year 2050)
-maritime_outputs = optimize_fuel_allocation(df_prices, df_ghg, maritime_base_prices, maritime_base_ghg, LHV, RHO, freight_volume, fuel_consumption, "Maritime")
-# Maritime fuel options: Hydrogen (f) LNG (g) Diesel (h) Ammonia
+    # Print results for each mode
+    for mode in MODES:
+        print_optimized_results(outputs[mode], mode)
 
-# Print results for Highway optimization
-print_optimized_results(highway_outputs, "Highway")
+    # Save the results for regression checks with diff_module
+    if args.output:
+        results_to_frame(outputs, pipeline.df_prices).to_csv(args.output, index=False)
+    if args.baseline_output:
+        baseline_outputs = tuple(baseline[mode][0] for mode in MODES) + tuple(baseline[mode][1] for mode in MODES)
+        diff_module.baseline_to_frame(baseline_outputs).to_csv(args.baseline_output, index=False)
 
-# Print results for Rail optimization
-print_optimized_results(rail_outputs, "Rail")
 
-# Print results for Maritime optimization
-print_optimized_results(maritime_outputs, "Maritime")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -1,125 +1,179 @@
 from pyomo.environ import *
 import pandas as pd
-def Run(df_prices, df_ghg, baseline_cost, baseline_ghg, LHV, RHO, freight_volume, fuel_consumption, max_cost_incrase, mode, mode_fuel_options):
 
+
+def build_coefficients(df_prices, df_ghg, LHV, RHO, freight_volume, fuel_consumption, mode, mode_fuel_options):
     """
-    Optimize the allocation of freight volume to different reporting fuels using Pyomo 
-    to minimize the total fuel emissions of the freight sector, while keeping costs <20% increase relative to the baseline case.
+    Compute the final per-fuel cost ($B) and GHG (Million KgCO2eq) coefficients of the 2050
+    allocation problem for every scenario of a transportation mode.
 
     Args:
         df_prices (pd.DataFrame): The input fuel price data containing fuel costs for different scenarios.
         df_ghg (pd.DataFrame): The input fuel ghg emissions data containing emissions for different scenarios
-        baseline_cost (pd.DataFrame): The baseline fuel cost used for comparison against reporting_fuel=petroleum diesel.
-        baseline_ghg (pd.DataFrame): The baseline emissions for comparison against reporting_fuel=petroleum diesel
         LHV (dict): Lower heating values of fuels.
         RHO (dict): Density of fuels.
         freight_volume (dict): Freight volume split.
         fuel_consumption (dict): Fuel consumption profile (in G/mile).
-        max_cost_increase : upper limit on total system cost increase
         mode (str): Transportation mode ("Highway", "Rail", "Maritime").
         mode_fuel_options (dict): which fuels to consider for allocation
 
     Returns:
-        dict: A dictionary containing optimized allocations, emissions, and costs for each scenario.
+        dict: A dictionary where keys are scenarios and values are (fuel_costs, fuel_ghg) tuples of dicts keyed by fuel.
     """
     # Filter the DataFrame for Year = 2050
     filtered_df_prices = df_prices[(df_prices['year'] == 2050)]
     filtered_df_ghg = df_ghg[(df_ghg['year'] == 2050)]
 
-    # Initialize results dictionary
-    results = {}
+    # Remove Ammonia for Highway and Rail, remove different fuels for maritime
+    selected_fuels = mode_fuel_options[mode]
+    filtered_df_prices = filtered_df_prices[filtered_df_prices['reporting_fuel'].isin(selected_fuels)]
+    filtered_df_ghg = filtered_df_ghg[filtered_df_ghg['fuel'].isin(selected_fuels)]
+
+    # Initialize coefficients dictionary
+    coefficients = {}
 
-    #print(len(filtered_df_prices['scenario'].unique()))
-    unique_scenarios = filtered_df_prices['scenario'].unique() # unique scenarios
+    ghg_by_scenario = dict(tuple(filtered_df_ghg.groupby('scenario', sort=False)))
 
     # Loop through each unique scenario in the filtered DataFrame
-    for scenario in unique_scenarios:
-        # Extract the rows corresponding to the current scenario
-        # Remove Ammonia for Highway and Rail, remove different fuels for maritime
-        def filter_fuels_prices(df, mode):
-            selected_fuels = mode_fuel_options[mode]
-            return df[df['reporting_fuel'].isin(selected_fuels)]
-        
-        def filter_fuels_ghg(df, mode):
-            selected_fuels = mode_fuel_options[mode]
-            return df[df['fuel'].isin(selected_fuels)]
-        
-        scenario_df_prices = filter_fuels_prices(filtered_df_prices[(filtered_df_prices['scenario'] == scenario)], mode)
-        scenario_df_ghg = filter_fuels_ghg(filtered_df_ghg[(filtered_df_ghg['scenario'] == scenario)], mode)
-        
-        # if mode in ["Highway","Rail"]:
-        #     scenario_df_prices = filtered_df_prices[(filtered_df_prices['scenario'] == scenario) & (~filtered_df_prices['reporting_fuel'].isin(['ammonia', 'electricity']))]
-        #     scenario_df_ghg = filtered_df_ghg[(filtered_df_ghg['scenario'] == scenario) & (~filtered_df_ghg['fuel'].isin(['ammonia', 'electricity']))]
-        # else:
-        #     scenario_df_prices = filtered_df_prices[(filtered_df_prices['scenario'] == scenario) & (~filtered_df_prices['reporting_fuel'].isin(['e-diesel', 'electricity', 'FT biofuels', 'FT biofuels CCS', 'renewable diesel', 'hydrogen']))]
-        #     scenario_df_ghg = filtered_df_ghg[(filtered_df_ghg['scenario'] == scenario) & (~filtered_df_ghg['fuel'].isin(['e-diesel', 'electricity', 'FT biofuels', 'FT biofuels CCS', 'renewable diesel', 'hydrogen']))]
+    for scenario, scenario_df_prices in filtered_df_prices.groupby('scenario', sort=False):
+        scenario_df_prices = scenario_df_prices.copy()
+        scenario_df_ghg = ghg_by_scenario.get(scenario, filtered_df_ghg.iloc[0:0])
 
         # Modify costs of FT biofuels and FT biofuels CCS for the Biomass Supply = Constrained case
         if scenario_df_prices['Biomass Supply'].iloc[1] in ["Constrained"] and mode in ["Highway", "Rail"]:
             scenario_df_prices.loc[scenario_df_prices['reporting_fuel'].isin(['FT biofuels', 'FT biofuels CCS']), 'price_USDperGJ'] = 2.5 * scenario_df_prices.loc[scenario_df_prices['reporting_fuel'].isin(['FT biofuels', 'FT biofuels CCS']), 'price_USDperGJ']
-        
+
         # Modify costs of hydrogen for maritime (liquified hydrogen costs are higher)
         if mode in ["Maritime"]:
             scenario_df_prices.loc[scenario_df_prices['reporting_fuel'].isin(['hydrogen']), 'price_USDperGJ'] = 2.5 * scenario_df_prices.loc[scenario_df_prices['reporting_fuel'].isin(['hydrogen']), 'price_USDperGJ']
 
         # Sets: Reporting fuels
         reporting_fuels = scenario_df_prices['reporting_fuel'].to_list()
-        
-         # Define the optimization model
-        model = ConcreteModel()
-        model.fuels = Set(initialize=reporting_fuels) # set of fuels
-
-        # Parameters: fuel costs and emissions
-        gcam_fuel_costs = scenario_df_prices[['reporting_fuel','price_USDperGJ']]
+        gcam_fuel_costs = dict(zip(reporting_fuels, scenario_df_prices['price_USDperGJ'].astype(float)))
 
         fuel_costs = {}
         for fuels in reporting_fuels:
             if mode=="Highway":
-                fuel_costs[fuels] = gcam_fuel_costs[gcam_fuel_costs['reporting_fuel'] == fuels]['price_USDperGJ'].values * float(fuel_consumption['Highway'][fuels]) * (float(LHV['Highway'][fuels])/1000)*float(freight_volume['Highway'])
+                fuel_costs[fuels] = gcam_fuel_costs[fuels] * float(fuel_consumption['Highway'][fuels]) * (float(LHV['Highway'][fuels])/1000)*float(freight_volume['Highway'])
             elif mode=="Rail":
-                fuel_costs[fuels] = gcam_fuel_costs[gcam_fuel_costs['reporting_fuel'] == fuels]['price_USDperGJ'].values * float(fuel_consumption['Rail'][fuels]) * (float(LHV['Rail'][fuels])/1000)*float(freight_volume['Rail'])
+                fuel_costs[fuels] = gcam_fuel_costs[fuels] * float(fuel_consumption['Rail'][fuels]) * (float(LHV['Rail'][fuels])/1000)*float(freight_volume['Rail'])
             elif mode=="Maritime":
-                fuel_prices = gcam_fuel_costs[gcam_fuel_costs['reporting_fuel'] == fuels]['price_USDperGJ'].values * float(RHO['Maritime'][fuels]) * (float(LHV['Maritime'][fuels])/1000)
+                fuel_prices = gcam_fuel_costs[fuels] * float(RHO['Maritime'][fuels]) * (float(LHV['Maritime'][fuels])/1000)
                 fuel_costs[fuels] = 0.01*(2.636e-2 * fuel_prices + 8.841e-3 * 27.34 + 4.47e-6 * 287331 + 1.0411) * float(freight_volume['Maritime'])
             else:
                 print(f"Fuel cost allocation failed for scenario: {scenario}")
-            
-        model.cost = Param(model.fuels, initialize=dict(zip(reporting_fuels, fuel_costs.values())))
-        fuel_ghg_df = {}
-        for fuels in reporting_fuels:
-            fuel_ghg_df[fuels] = scenario_df_ghg[scenario_df_ghg['fuel'] == fuels]['kgCO2e_GJ'].sum()
 
-        #gcam_fuel_ghg = list(fuel_ghg_df.values())
+        fuel_ghg_df = scenario_df_ghg.groupby('fuel')['kgCO2e_GJ'].sum()
+
         fuel_ghg = {}
         for fuels in reporting_fuels:
             if mode=="Highway":
-                fuel_ghg[fuels] = fuel_ghg_df[fuels] * (float(LHV['Highway'][fuels])/1000) * float(fuel_consumption['Highway'][fuels]) * float(freight_volume['Highway']) #Million KgCO2eq
+                fuel_ghg[fuels] = float(fuel_ghg_df.get(fuels, 0.0)) * (float(LHV['Highway'][fuels])/1000) * float(fuel_consumption['Highway'][fuels]) * float(freight_volume['Highway']) #Million KgCO2eq
             elif mode=="Rail":
-                fuel_ghg[fuels] = fuel_ghg_df[fuels] * (float(LHV['Rail'][fuels])/1000) * float(fuel_consumption['Rail'][fuels]) * float(freight_volume['Rail']) #Million KgCO2eq
+                fuel_ghg[fuels] = float(fuel_ghg_df.get(fuels, 0.0)) * (float(LHV['Rail'][fuels])/1000) * float(fuel_consumption['Rail'][fuels]) * float(freight_volume['Rail']) #Million KgCO2eq
             elif mode=="Maritime":
-                fuel_ghg[fuels] = fuel_ghg_df[fuels] * (float(LHV['Maritime'][fuels])/1000) * (float(fuel_consumption['Maritime'][fuels])/1000) * float(freight_volume['Maritime']) #Million KgCO2eq
+                fuel_ghg[fuels] = float(fuel_ghg_df.get(fuels, 0.0)) * (float(LHV['Maritime'][fuels])/1000) * (float(fuel_consumption['Maritime'][fuels])/1000) * float(freight_volume['Maritime']) #Million KgCO2eq
             else:
                 print(f"Fuel ghg allocation failed for scenario: {scenario}")
 
-        model.ghg = Param(model.fuels, initialize=dict(zip(reporting_fuels, fuel_ghg.values())))   
-    
-        # Variables: Fraction of freight volume allocated to each fuel
-        model.allocation = Var(model.fuels, bounds=(0,1))
+        coefficients[scenario] = (fuel_costs, fuel_ghg)
+
+    return coefficients
+
+
+def build_model(fuel_costs, fuel_ghg, max_cost):
+    """
+    Build the Pyomo model minimizing total fuel emissions subject to a total cost cap.
+
+    Args:
+        fuel_costs (dict): Cost coefficient ($B) of each fuel.
+        fuel_ghg (dict): GHG coefficient (Million KgCO2eq) of each fuel.
+        max_cost (float): Upper limit on total system cost ($B).
+
+    Returns:
+        ConcreteModel: The allocation model.
+    """
+    reporting_fuels = list(fuel_costs)
+
+    # Define the optimization model
+    model = ConcreteModel()
+    model.fuels = Set(initialize=reporting_fuels) # set of fuels
+
+    # Parameters: fuel costs and emissions
+    model.cost = Param(model.fuels, initialize=fuel_costs)
+    model.ghg = Param(model.fuels, initialize=fuel_ghg)
+
+    # Variables: Fraction of freight volume allocated to each fuel
+    model.allocation = Var(model.fuels, bounds=(0,1))
+
+    # Objective: Minimize relative total fuel ghg
+    def objective_rule(model):
+        return sum(model.ghg[f] * model.allocation[f] for f in model.fuels)
+    model.objective = Objective(rule=objective_rule, sense=minimize)
+
+    # Constraint: Total allocation must sum to 100% of freight volume
+    def total_allocation_constraint(model):
+        return sum(model.allocation[f] for f in model.fuels) ==1
+    model.total_allocation = Constraint(rule=total_allocation_constraint)
+
+    # Constraint: Total cost increase below the cost cap
+    def total_cost_increase(model):
+        return sum(model.cost[f] * model.allocation[f] for f in model.fuels) <= max_cost
+    model.cost_increase = Constraint(rule=total_cost_increase)
+
+    return model
+
+
+def problem_key(fuel_costs, fuel_ghg, baseline_cost, baseline_ghg):
+    """
+    Hashable key identifying a scenario's allocation problem: its final cost/GHG coefficient vectors
+    and baseline. Scenarios with equal keys have the same optimal allocation and percentage changes.
+    """
+    return (tuple(fuel_costs.items()), tuple(fuel_ghg.items()), float(baseline_cost), float(baseline_ghg))
+
+
+def group_scenarios(coefficients, baseline_cost, baseline_ghg):
+    """
+    Group the scenarios of build_coefficients by problem_key.
+
+    Returns:
+        dict: A dictionary where keys are problem keys and values are the lists of scenarios sharing that problem.
+    """
+    groups = {}
+    for scenario, (fuel_costs, fuel_ghg) in coefficients.items():
+        key = problem_key(fuel_costs, fuel_ghg, baseline_cost[scenario], baseline_ghg[scenario])
+        groups.setdefault(key, []).append(scenario)
+    return groups
+
+
+def solve_coefficients(coefficients, baseline_cost, baseline_ghg, max_cost_incrase, stats=None):
+    """
+    Solve the allocation problem of every scenario from precomputed coefficients. Scenarios sharing
+    the same coefficients and baseline are solved once and the result is copied to each of them.
+
+    Args:
+        coefficients (dict): Output of build_coefficients.
+        baseline_cost (dict): The baseline fuel cost used for comparison against reporting_fuel=petroleum diesel.
+        baseline_ghg (dict): The baseline emissions for comparison against reporting_fuel=petroleum diesel
+        max_cost_increase : upper limit on total system cost increase
+        stats (dict): Optional dictionary filled with the number of scenarios, unique problems and solves saved.
+
+    Returns:
+        dict: A dictionary containing optimized allocations, emissions, and costs for each scenario.
+    """
+    # Group scenarios by problem so each distinct problem is solved once
+    groups = group_scenarios(coefficients, baseline_cost, baseline_ghg)
 
-        # Objective: Minimize relative total fuel ghg
-        def objective_rule(model):
-            return sum(model.ghg[f] * model.allocation[f] for f in model.fuels)
-        model.objective = Objective(rule=objective_rule, sense=minimize)
+    # Initialize results dictionary
+    results = {}
 
-        # Constraint: Total allocation must sum to 100% of freight volume
-        def total_allocation_constraint(model):
-            return sum(model.allocation[f] for f in model.fuels) ==1
-        model.total_allocation = Constraint(rule=total_allocation_constraint)
+    for scenarios in groups.values():
+        scenario = scenarios[0]
+        fuel_costs, fuel_ghg = coefficients[scenario]
+        reporting_fuels = list(fuel_costs)
 
-        # Constraint: Total cost increase < 20% from baseline cost of diesel
-        def total_cost_increase(model):
-            return sum(model.cost[f] * model.allocation[f] for f in model.fuels) <= (1+ (max_cost_incrase/100))  * baseline_cost[scenario]
-        model.cost_increase = Constraint(rule=total_cost_increase)
+        # Constraint: Total cost increase < max_cost_incrase from baseline cost of diesel
+        model = build_model(fuel_costs, fuel_ghg, (1+ (max_cost_incrase/100))  * baseline_cost[scenario])
 
         # Solve the optimization problem
         solver = SolverFactory('glpk') # Use GLPK solver; replace with 'gurobi' if available
@@ -127,21 +181,56 @@ def Run(df_prices, df_ghg, baseline_cost, baseline_ghg, LHV, RHO, freight_volume
 
         if result.solver.status == SolverStatus.ok and result.solver.termination_condition == TerminationCondition.optimal:
             # Extract optimized allocations
-            print(f"Optimization succeded for scenario: {scenario}")
             allocations = {f: model.allocation[f].value for f in reporting_fuels}
             minimized_ghg = model.objective()
             total_cost = sum(model.allocation[f].value * model.cost[f] for f in reporting_fuels)
 
-            # Store results
-            results[scenario] = {
-                "allocations": allocations,
-                "percent_ghg": ((minimized_ghg/baseline_ghg[scenario])-1)*100, # convert to percentage change
-                "percent_cost": ((total_cost/baseline_cost[scenario])-1)*100 # convert to percentage change
-            }
+            # Store results for every scenario sharing this problem
+            for scenario in scenarios:
+                print(f"Optimization succeded for scenario: {scenario}")
+                results[scenario] = {
+                    "allocations": dict(allocations),
+                    "percent_ghg": ((minimized_ghg/baseline_ghg[scenario])-1)*100, # convert to percentage change
+                    "percent_cost": ((total_cost/baseline_cost[scenario])-1)*100 # convert to percentage change
+                }
         else:
-            print(f"Optimization failed for scenario: {scenario}")
-            results[scenario] = {"allocations": None, "percent_ghg": None, "percent_cost": None}
-    
-    return results
+            for scenario in scenarios:
+                print(f"Optimization failed for scenario: {scenario}")
+                results[scenario] = {"allocations": None, "percent_ghg": None, "percent_cost": None}
+
+    solves_saved = len(coefficients) - len(groups)
+    print(f"Solved {len(groups)} unique problems for {len(coefficients)} scenarios ({solves_saved} solves saved)")
+    if stats is not None:
+        stats.update(scenarios=len(coefficients), unique_problems=len(groups), solves_saved=solves_saved)
+
+    # Keep the scenario order of the input data
+    return {scenario: results[scenario] for scenario in coefficients}
+
+
+def Run(df_prices, df_ghg, baseline_cost, baseline_ghg, LHV, RHO, freight_volume, fuel_consumption, max_cost_incrase, mode, mode_fuel_options):
+
+    """
+    Optimize the allocation of freight volume to different reporting fuels using Pyomo
+    to minimize the total fuel emissions of the freight sector, while keeping costs below max_cost_incrase relative to the baseline case.
+
+    Args:
+        df_prices (pd.DataFrame): The input fuel price data containing fuel costs for different scenarios.
+        df_ghg (pd.DataFrame): The input fuel ghg emissions data containing emissions for different scenarios
+        baseline_cost (dict): The baseline fuel cost used for comparison against reporting_fuel=petroleum diesel.
+        baseline_ghg (dict): The baseline emissions for comparison against reporting_fuel=petroleum diesel
+        LHV (dict): Lower heating values of fuels.
+        RHO (dict): Density of fuels.
+        freight_volume (dict): Freight volume split.
+        fuel_consumption (dict): Fuel consumption profile (in G/mile).
+        max_cost_increase : upper limit on total system cost increase
+        mode (str): Transportation mode ("Highway", "Rail", "Maritime").
+        mode_fuel_options (dict): which fuels to consider for allocation
+
+    Returns:
+        dict: A dictionary containing optimized allocations, emissions, and costs for each scenario.
+    """
+    coefficients = build_coefficients(df_prices, df_ghg, LHV, RHO, freight_volume, fuel_consumption, mode, mode_fuel_options)
+
+    return solve_coefficients(coefficients, baseline_cost, baseline_ghg, max_cost_incrase)
 
-# end code
\ No newline at end of file
+# end code
@@ -0,0 +1,266 @@
+from pyomo.environ import *
+import math
+import time
+import pandas as pd
+import MultiObjOpt_module
+
+# Relative tolerance used when capping an objective at the value of a previous solve
+TOLERANCE = 1e-9
+
+# Solver option names of the time limit (s)
+TIME_LIMIT_OPTIONS = {"glpk": "tmlim", "cbc": "seconds", "appsi_highs": "time_limit"}
+
+
+def build_pareto_model(reporting_fuels):
+    """
+    Build one allocation model for all fuels of a mode, with mutable coefficients and caps so it can be
+    re-solved for every scenario and trade-off point without being rebuilt.
+
+    Args:
+        reporting_fuels (list): Every fuel appearing in the scenarios of the mode.
+
+    Returns:
+        ConcreteModel: The allocation model with ghg, cost and weighted objectives (all deactivated).
+    """
+    model = ConcreteModel()
+    model.fuels = Set(initialize=reporting_fuels) # set of fuels
+
+    # Parameters: fuel costs and emissions, availability of each fuel in the scenario, caps and weighted-sum weight
+    model.cost = Param(model.fuels, mutable=True, initialize=0.0)
+    model.ghg = Param(model.fuels, mutable=True, initialize=0.0)
+    model.available = Param(model.fuels, mutable=True, initialize=1.0)
+    model.max_cost = Param(mutable=True, initialize=0.0)
+    model.max_ghg = Param(mutable=True, initialize=0.0)
+    model.weight = Param(mutable=True, initialize=0.5)
+    model.cost_scale = Param(mutable=True, initialize=1.0)
+    model.ghg_scale = Param(mutable=True, initialize=1.0)
+
+    # Variables: Fraction of freight volume allocated to each fuel
+    model.allocation = Var(model.fuels, bounds=(0,1))
+
+    total_cost = sum(model.cost[f] * model.allocation[f] for f in model.fuels)
+    total_ghg = sum(model.ghg[f] * model.allocation[f] for f in model.fuels)
+
+    # Objectives: total ghg, total cost, or a normalized weighted sum of both
+    model.ghg_objective = Objective(expr=total_ghg, sense=minimize)
+    model.cost_objective = Objective(expr=total_cost, sense=minimize)
+    model.weighted_objective = Objective(expr=model.weight * total_cost / model.cost_scale + (1 - model.weight) * total_ghg / model.ghg_scale, sense=minimize)
+    for objective in (model.ghg_objective, model.cost_objective, model.weighted_objective):
+        objective.deactivate()
+
+    # Constraint: Total allocation must sum to 100% of freight volume
+    model.total_allocation = Constraint(expr=sum(model.allocation[f] for f in model.fuels) == 1)
+
+    # Constraint: Fuels missing from the scenario get no allocation
+    def availability_rule(model, f):
+        return model.allocation[f] <= model.available[f]
+    model.availability = Constraint(model.fuels, rule=availability_rule)
+
+    # Constraints: epsilon caps on total cost and total ghg (activated as needed)
+    model.cost_cap = Constraint(expr=total_cost <= model.max_cost)
+    model.ghg_cap = Constraint(expr=total_ghg <= model.max_ghg)
+    model.cost_cap.deactivate()
+    model.ghg_cap.deactivate()
+
+    return model
+
+
+def set_scenario(model, fuel_costs, fuel_ghg):
+    """
+    Load the coefficients of one scenario into the mutable parameters of a pareto model.
+    """
+    for f in model.fuels:
+        model.available[f].value = 1.0 if f in fuel_costs else 0.0
+        model.cost[f].value = fuel_costs.get(f, 0.0)
+        model.ghg[f].value = fuel_ghg.get(f, 0.0)
+
+
+def solve_point(model, solver, objective, max_cost=None, max_ghg=None, time_limit=None):
+    """
+    Solve the model for one objective with optional cost and ghg caps and solver time limit (s).
+
+    Returns:
+        tuple: (total_cost, total_ghg, allocations), or None if the solve failed.
+    """
+    option = TIME_LIMIT_OPTIONS.get(solver.name)
+    if option is not None and time_limit is not None:
+        # GLPK only takes whole seconds
+        solver.options[option] = max(1, int(math.ceil(time_limit))) if solver.name == "glpk" else time_limit
+
+    for candidate in (model.ghg_objective, model.cost_objective, model.weighted_objective):
+        candidate.deactivate()
+    objective.activate()
+    for cap, param, limit in ((model.cost_cap, model.max_cost, max_cost), (model.ghg_cap, model.max_ghg, max_ghg)):
+        if limit is None:
+            cap.deactivate()
+        else:
+            param.value = limit + TOLERANCE * max(1.0, abs(limit))
+            cap.activate()
+
+    result = solver.solve(model)
+    if not (result.solver.status == SolverStatus.ok and result.solver.termination_condition == TerminationCondition.optimal):
+        return None
+    allocations = {f: model.allocation[f].value for f in model.fuels if value(model.available[f])}
+    total_cost = sum(value(model.cost[f]) * model.allocation[f].value for f in allocations)
+    total_ghg = sum(value(model.ghg[f]) * model.allocation[f].value for f in allocations)
+    return total_cost, total_ghg, allocations
+
+
+def nondominated(points):
+    """
+    Keep the nondominated (cost, ghg, allocations) points, sorted by increasing cost.
+    """
+    front = []
+    for point in sorted(points, key=lambda p: (p[0], p[1])):
+        if not front or point[1] < front[-1][1] - TOLERANCE * max(1.0, abs(front[-1][1])):
+            front.append(point)
+    return front
+
+
+def trade_off(model, solver, fuel_costs, fuel_ghg, time_limit=10):
+    """
+    Compute the vertices of the cost-vs-GHG nondominated set of one scenario.
+
+    The two anchors are the cheapest allocation (with the least GHG among those) and the lowest-GHG
+    allocation (with the least cost among those). Between them, a dichotomic weighted-sum search (NISE)
+    minimizes the weighted sum whose weights are normal to each segment joining two known vertices; a solution
+    strictly below the segment is a new vertex and splits it, otherwise the segment is an edge of the front.
+    Since the front of the LP is convex and piecewise linear, this finds every vertex exactly, in at most
+    2V - 1 weighted solves for V vertices.
+
+    Args:
+        model (ConcreteModel): Output of build_pareto_model for the mode.
+        solver: Pyomo solver used for every solve.
+        fuel_costs (dict): Cost coefficient ($B) of each fuel.
+        fuel_ghg (dict): GHG coefficient (Million KgCO2eq) of each fuel.
+        time_limit (float): Wall time budget of the scenario (s); every solve gets the remaining budget as
+                            solver time limit, and the search stops once it is spent.
+
+    Returns:
+        tuple: (list of nondominated (cost, ghg, allocations) vertices, whether the search completed with every
+               weighted solve succeeding, i.e. the vertices are the exact front).
+    """
+    start = time.perf_counter()
+    set_scenario(model, fuel_costs, fuel_ghg)
+    timed_out = False
+    complete = True
+
+    def solve(objective, **caps):
+        nonlocal timed_out
+        remaining = time_limit - (time.perf_counter() - start)
+        if remaining <= 0:
+            timed_out = True
+            return None
+        point = solve_point(model, solver, objective, time_limit=remaining, **caps)
+        if point is None and time.perf_counter() - start >= time_limit:
+            timed_out = True
+        return point
+
+    # Anchors of the trade-off curve
+    cheapest = solve(model.cost_objective)
+    if cheapest is None:
+        return [], not timed_out
+    cheapest = solve(model.ghg_objective, max_cost=cheapest[0]) or cheapest
+    cleanest = solve(model.ghg_objective)
+    if cleanest is None:
+        return [cheapest], False
+    cleanest = solve(model.cost_objective, max_ghg=cleanest[1]) or cleanest
+    points = [cheapest, cleanest]
+
+    if cleanest[0] > cheapest[0] and cheapest[1] > cleanest[1]:
+        # Work in coordinates normalized by the span of the anchors, so both objectives weigh alike
+        cost_scale = cleanest[0] - cheapest[0]
+        ghg_scale = cheapest[1] - cleanest[1]
+        model.cost_scale.value = cost_scale
+        model.ghg_scale.value = ghg_scale
+
+        segments = [(cheapest, cleanest)]
+        while segments and not timed_out:
+            left, right = segments.pop()
+            cost_span = (right[0] - left[0]) / cost_scale
+            ghg_span = (left[1] - right[1]) / ghg_scale
+            weight = ghg_span / (cost_span + ghg_span)
+            model.weight.value = weight
+            point = solve(model.weighted_objective)
+            if point is None:
+                # The segment stays unexplored, so the front may miss vertices
+                complete = False
+                continue
+
+            def score(p):
+                return weight * p[0] / cost_scale + (1 - weight) * p[1] / ghg_scale
+            if score(point) < score(left) - TOLERANCE * max(1.0, abs(score(left))):
+                points.append(point)
+                segments.extend([(left, point), (point, right)])
+
+    return nondominated(points), complete and not timed_out
+
+
+def solve_coefficients(coefficients, baseline_cost, baseline_ghg, time_limit=10, solver_name="glpk"):
+    """
+    Compute the cost-vs-GHG nondominated set of every scenario of a mode, reusing a single model for all
+    scenarios and solving each distinct problem once.
+
+    Args:
+        coefficients (dict): Output of MultiObjOpt_module.build_coefficients.
+        baseline_cost (dict): The baseline fuel cost used for comparison against reporting_fuel=petroleum diesel.
+        baseline_ghg (dict): The baseline emissions for comparison against reporting_fuel=petroleum diesel
+        time_limit (float): Wall time budget per scenario (s), see trade_off.
+        solver_name (str): LP solver, GLPK by default.
+
+    Returns:
+        dict: A dictionary where keys are scenarios and values hold the "vertices" of the trade-off curve
+              (allocations, percent_ghg and percent_cost of each vertex, by increasing cost) and whether the search "complete"d.
+    """
+    reporting_fuels = []
+    for fuel_costs, _ in coefficients.values():
+        reporting_fuels.extend(f for f in fuel_costs if f not in reporting_fuels)
+    model = build_pareto_model(reporting_fuels)
+    solver = SolverFactory(solver_name)
+
+    # Initialize results dictionary
+    results = {}
+
+    for scenarios in MultiObjOpt_module.group_scenarios(coefficients, baseline_cost, baseline_ghg).values():
+        fuel_costs, fuel_ghg = coefficients[scenarios[0]]
+        points, complete = trade_off(model, solver, fuel_costs, fuel_ghg, time_limit)
+        for scenario in scenarios:
+            results[scenario] = {
+                "vertices": [{
+                    "allocations": dict(allocations),
+                    "percent_ghg": ((total_ghg/baseline_ghg[scenario])-1)*100, # convert to percentage change
+                    "percent_cost": ((total_cost/baseline_cost[scenario])-1)*100 # convert to percentage change
+                } for total_cost, total_ghg, allocations in points],
+                "complete": complete,
+            }
+
+    # Keep the scenario order of the input data
+    return {scenario: results[scenario] for scenario in coefficients}
+
+
+def to_frame(results, mode):
+    """
+    Flatten the trade-off curves of a mode into the row layout of the Dashboard results table,
+    with one row per vertex.
+
+    Args:
+        results (dict): Output of solve_coefficients.
+        mode (str): Transportation mode ("Highway", "Rail", "Maritime").
+
+    Returns:
+        pd.DataFrame: Mode, Scenario, Vertex, Percent GHG Change, Percent Cost Change and Allocation (fuel) columns.
+    """
+    rows = []
+    for scenario, result in results.items():
+        for vertex, point in enumerate(result["vertices"]):
+            row = {
+                "Mode": mode,
+                "Scenario": scenario,
+                "Vertex": vertex,
+                "Percent GHG Change": point["percent_ghg"],
+                "Percent Cost Change": point["percent_cost"]
+            }
+            for fuel, allocation in point["allocations"].items():
+                row[f"Allocation ({fuel})"] = allocation
+            rows.append(row)
+    return pd.DataFrame(rows)
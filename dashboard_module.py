@@ -0,0 +1,113 @@
+import numpy as np
+import plotly.graph_objects as go
+
+X_COLUMN = "Percent GHG Change"
+Y_COLUMN = "Percent Cost Change"
+LABELS = {X_COLUMN: "Emissions Change (%)", Y_COLUMN: "Cost Change (%)"}
+
+
+def filter_results(results_df, filters):
+    """
+    Keep the result rows matching the selected values of each column.
+
+    Args:
+        results_df (pd.DataFrame): Flattened results, see optimization_module.results_to_frame.
+        filters (dict): Column -> selected values; empty selections keep every row.
+
+    Returns:
+        pd.DataFrame: The filtered results.
+    """
+    mask = np.ones(len(results_df), dtype=bool)
+    for column, values in filters.items():
+        if values:
+            mask &= results_df[column].isin(values).to_numpy()
+    return results_df[mask]
+
+
+def downsample(results_df, max_points, seed=0):
+    """
+    Randomly keep at most max_points rows, so plots send a bounded number of points to the browser.
+    """
+    if len(results_df) <= max_points:
+        return results_df
+    return results_df.sample(n=max_points, random_state=seed)
+
+
+def as_typed_array(values):
+    """
+    Convert a column to a float32 numpy array; plotly serializes numpy arrays as binary typed arrays
+    instead of per-point JSON numbers.
+    """
+    return np.asarray(values, dtype=np.float32)
+
+
+def scatter_figure(mode_data, mode, max_points=5000):
+    """
+    WebGL scatter of a downsampled set of results, with the scenario and allocations shown on hover.
+
+    Args:
+        mode_data (pd.DataFrame): Solved results of one mode.
+        mode (str): Transportation mode ("Highway", "Rail", "Maritime").
+        max_points (int): Maximum number of points sent to the browser.
+
+    Returns:
+        go.Figure: The scatter plot.
+    """
+    sample = downsample(mode_data, max_points)
+    allocation_columns = [col for col in sample.columns if "Allocation" in col and sample[col].notna().any()]
+    hover = "".join([f"<br>{col}: %{{customdata[{i}]:.3f}}" for i, col in enumerate(allocation_columns)])
+
+    fig = go.Figure(go.Scattergl(
+        x=as_typed_array(sample[X_COLUMN]),
+        y=as_typed_array(sample[Y_COLUMN]),
+        mode="markers",
+        marker=dict(size=8, opacity=0.8),
+        # Allocations go as a float32 matrix (binary); only the scenario names are sent as text
+        customdata=as_typed_array(sample[allocation_columns]) if allocation_columns else None,
+        text=sample["Scenario"].to_numpy(dtype=object),
+        hovertemplate="Scenario: %{text}" + hover + "<extra></extra>",
+    ))
+    shown = f" ({len(sample)} of {len(mode_data)} points)" if len(sample) < len(mode_data) else ""
+    fig.update_layout(title=f"{mode} Mode: Emissions vs Cost Changes{shown}", xaxis_title=LABELS[X_COLUMN],
+                      yaxis_title=LABELS[Y_COLUMN], template="plotly_white")
+    return fig
+
+
+def density_figure(mode_data, mode, bins=60):
+    """
+    Density heatmap of results binned on the server, so only bins x bins counts reach the browser.
+
+    Args:
+        mode_data (pd.DataFrame): Solved results of one mode.
+        mode (str): Transportation mode ("Highway", "Rail", "Maritime").
+        bins (int): Number of bins along each axis.
+
+    Returns:
+        go.Figure: The density heatmap.
+    """
+    counts, x_edges, y_edges = np.histogram2d(mode_data[X_COLUMN].to_numpy(dtype=float), mode_data[Y_COLUMN].to_numpy(dtype=float), bins=bins)
+    counts[counts == 0] = np.nan # leave empty bins blank
+
+    fig = go.Figure(go.Heatmap(
+        x=as_typed_array((x_edges[:-1] + x_edges[1:]) / 2),
+        y=as_typed_array((y_edges[:-1] + y_edges[1:]) / 2),
+        z=as_typed_array(counts.T),
+        colorscale="Viridis",
+        colorbar=dict(title="Scenarios"),
+        hovertemplate=f"{LABELS[X_COLUMN]}: %{{x:.2f}}<br>{LABELS[Y_COLUMN]}: %{{y:.2f}}<br>Scenarios: %{{z}}<extra></extra>",
+    ))
+    fig.update_layout(title=f"{mode} Mode: Emissions vs Cost Changes ({len(mode_data)} results)", xaxis_title=LABELS[X_COLUMN],
+                      yaxis_title=LABELS[Y_COLUMN], template="plotly_white")
+    return fig
+
+
+def page(results_df, page_number, page_size=100):
+    """
+    Rows of one page (numbered from 1) of a results table.
+
+    Returns:
+        tuple: (rows of the page, number of pages)
+    """
+    n_pages = max(1, -(-len(results_df) // page_size))
+    page_number = min(max(1, page_number), n_pages)
+    return results_df.iloc[(page_number - 1) * page_size:page_number * page_size], n_pages
@@ -0,0 +1,148 @@
+import argparse
+import sys
+import numpy as np
+import pandas as pd
+
+KEYS = ["Mode", "Scenario"]
+
+
+def baseline_to_frame(baseline_outputs):
+    """
+    Flatten the output of BaselineObj.Run into one row per mode and scenario.
+
+    Args:
+        baseline_outputs (tuple): (highway_prices, rail_prices, maritime_prices, highway_ghg, rail_ghg, maritime_ghg).
+
+    Returns:
+        pd.DataFrame: Mode, Scenario, Baseline Cost and Baseline GHG columns.
+    """
+    highway_prices, rail_prices, maritime_prices, highway_ghg, rail_ghg, maritime_ghg = baseline_outputs
+    frames = []
+    for mode, prices, ghg in [("Highway", highway_prices, highway_ghg), ("Rail", rail_prices, rail_ghg), ("Maritime", maritime_prices, maritime_ghg)]:
+        frames.append(pd.DataFrame({
+            "Mode": mode,
+            "Scenario": list(prices),
+            "Baseline Cost": [float(prices[scenario]) for scenario in prices],
+            "Baseline GHG": [float(ghg.get(scenario, np.nan)) for scenario in prices],
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def read_results(path):
+    """
+    Read a results table saved as CSV or parquet.
+    """
+    if str(path).endswith(".parquet"):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+def side_values(merged, side_df, column, suffix):
+    """
+    Values of one side's column after the merge in compare; NaN where that side lacks the column.
+    """
+    if column not in side_df.columns:
+        return np.full(len(merged), np.nan)
+    name = f"{column}{suffix}" if f"{column}{suffix}" in merged.columns else column
+    return merged[name].to_numpy(dtype=float)
+
+
+def compare(old_df, new_df, tolerance=1e-6):
+    """
+    Compare two result sets aligned by mode and scenario, e.g. from optimization_module.results_to_frame
+    or baseline_to_frame. Each set must hold one row per mode and scenario (ValueError otherwise).
+
+    Args:
+        old_df (pd.DataFrame): Reference results.
+        new_df (pd.DataFrame): Results to check.
+        tolerance (float): Absolute change below which a value is considered unchanged.
+
+    Returns:
+        pd.DataFrame: One row per mode and scenario with the Presence of the row in each set ("both",
+                      "old only", "new only"), old and new Status with Status Flip, a Delta column per numeric
+                      column, the Max Allocation Shift and the Volume Shifted between fuels, and whether the row Changed.
+    """
+    # Rows are matched one to one, so repeated keys (e.g. one row per trade-off vertex) cannot be compared
+    for name, df in (("old", old_df), ("new", new_df)):
+        duplicates = df[df.duplicated(KEYS, keep=False)]
+        if len(duplicates):
+            first = duplicates.iloc[0]
+            raise ValueError(f"The {name} results repeat {len(duplicates)} rows by mode and scenario, "
+                             f"e.g. {first['Mode']} / {first['Scenario']}; expected one row per mode and scenario")
+
+    merged = old_df.merge(new_df, on=KEYS, how="outer", suffixes=(" (old)", " (new)"), indicator=True, validate="one_to_one")
+    diff = merged[KEYS].copy()
+    diff["Presence"] = merged["_merge"].map({"both": "both", "left_only": "old only", "right_only": "new only"}).astype(str)
+    changed = np.array(diff["Presence"] != "both", dtype=bool) # owned, writable copy for the in-place updates below
+
+    # Status flips, e.g. solved -> failed
+    if "Status" in old_df.columns and "Status" in new_df.columns:
+        diff["Status (old)"] = merged["Status (old)"]
+        diff["Status (new)"] = merged["Status (new)"]
+        diff["Status Flip"] = (merged["Status (old)"] != merged["Status (new)"]).to_numpy() & ~changed
+        changed |= diff["Status Flip"].to_numpy()
+
+    # Allocation shifts; fuels missing from one side have no allocation there
+    allocation_columns = sorted({col for col in list(old_df.columns) + list(new_df.columns) if col.startswith("Allocation")})
+    if allocation_columns:
+        old_allocations = np.column_stack([side_values(merged, old_df, col, " (old)") for col in allocation_columns])
+        new_allocations = np.column_stack([side_values(merged, new_df, col, " (new)") for col in allocation_columns])
+        solved = ~(np.isnan(old_allocations).all(axis=1) | np.isnan(new_allocations).all(axis=1))
+        shifts = np.abs(np.nan_to_num(new_allocations) - np.nan_to_num(old_allocations))
+        diff["Max Allocation Shift"] = np.where(solved, shifts.max(axis=1), np.nan)
+        diff["Volume Shifted"] = np.where(solved, shifts.sum(axis=1) / 2, np.nan) # share of freight volume moved between fuels
+        changed |= np.nan_to_num(diff["Max Allocation Shift"].to_numpy()) > tolerance
+
+    # Deltas of the other numeric columns, e.g. Percent GHG Change or Baseline Cost
+    value_columns = [col for col in old_df.columns if col in new_df.columns and col not in KEYS and not col.startswith("Allocation")
+                     and pd.api.types.is_numeric_dtype(old_df[col]) and pd.api.types.is_numeric_dtype(new_df[col])]
+    for col in value_columns:
+        old_values = merged[f"{col} (old)"].to_numpy(dtype=float)
+        new_values = merged[f"{col} (new)"].to_numpy(dtype=float)
+        delta = new_values - old_values
+        diff[f"Delta {col}"] = delta
+        # A value that appears or disappears (NaN on one side only) is a change too
+        changed |= (np.nan_to_num(np.abs(delta)) > tolerance) | (np.isnan(old_values) != np.isnan(new_values))
+
+    diff["Changed"] = changed
+    return diff
+
+
+def summarize(diff_df):
+    """
+    Per-mode counts of compared, changed and status-flipped scenarios, and the largest absolute deltas.
+
+    Args:
+        diff_df (pd.DataFrame): Output of compare.
+
+    Returns:
+        pd.DataFrame: One row per mode.
+    """
+    aggregations = {"Scenarios": ("Scenario", "size"), "Changed": ("Changed", "sum")}
+    if "Status Flip" in diff_df.columns:
+        aggregations["Status Flips"] = ("Status Flip", "sum")
+    for col in diff_df.columns:
+        if col.startswith("Delta ") or col == "Max Allocation Shift":
+            aggregations[f"Max |{col}|"] = (col, lambda values: values.abs().max())
+    return diff_df.groupby("Mode", sort=False).agg(**aggregations).reset_index()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two optimization or baseline result sets by mode and scenario.")
+    parser.add_argument("old", help="Reference results (CSV or parquet)")
+    parser.add_argument("new", help="Results to check (CSV or parquet)")
+    parser.add_argument("--tolerance", type=float, default=1e-6, help="Absolute change below which a value is unchanged")
+    parser.add_argument("--output", help="Write the per-scenario differences to this CSV file")
+    args = parser.parse_args(argv)
+
+    diff_df = compare(read_results(args.old), read_results(args.new), args.tolerance)
+    print(summarize(diff_df).to_string(index=False))
+    if args.output:
+        diff_df.to_csv(args.output, index=False)
+
+    # Exit status 1 when the results differ, as with diff
+    return 1 if diff_df["Changed"].any() else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,20 @@
 from pyomo.environ import *
+import pandas as pd
 import BaselineObj
 import MultiObjOpt_module
+import MultiObjMILP_module
+import ParetoOpt_module
+import streaming_module
 
-def calculate_baseline_module(df_prices, df_ghg, freight_volume, LHV, RHO):
+MODES = ["Highway", "Rail", "Maritime"]
+
+# Leading columns of the flattened results table
+RESULT_COLUMNS = ["Mode", "Scenario", "Status", "Percent GHG Change", "Percent Cost Change"]
+
+# GCAM scenario factor columns of the price data
+FACTOR_COLUMNS = ["Hydrogen and Ammonia", "Renewable Electricity", "Biomass Supply", "Nuclear Electricity", "CO2 Storage", "Emissions Policy"]
+
+def calculate_baseline_module(df_prices, df_ghg, freight_volume, LHV, RHO, fuel_consumption):
     """
     Calculate baseline costs and GHG emissions for petroleum diesel across Highway, Rail, and Maritime.
 
@@ -12,21 +24,22 @@ def calculate_baseline_module(df_prices, df_ghg, freight_volume, LHV, RHO):
         freight_volume (dict): Freight volume split between modes.
         LHV (dict): Lower heating value (MJ/kg) for each fuel type.
         RHO (dict): Density (kg/gallon) for each fuel type.
+        fuel_consumption (dict): Fuel consumption profile (in G/mile).
 
     Returns:
         tuple: Baseline costs and GHG emissions for Highway, Rail, and Maritime modes.
     """
-    # Call the baseline logic of petroleum diesel (assumes BaselineObj.Run exists)
-    BaselineOutputs = BaselineObj.Run(df_prices, df_ghg, LHV, RHO, freight_volume)
+    # Call the baseline logic of petroleum diesel
+    BaselineOutputs = BaselineObj.Run(df_prices, df_ghg, LHV, RHO, fuel_consumption, freight_volume)
 
     # The output from BaselineObj includes baseline prices and GHG emissions for highway, rail, and maritime
     highway_base_prices, rail_base_prices, maritime_base_prices, highway_base_ghg, rail_base_ghg, maritime_base_ghg = BaselineOutputs
-    
+
     # Return a tuple of all baseline data
     return highway_base_prices, rail_base_prices, maritime_base_prices, highway_base_ghg, rail_base_ghg, maritime_base_ghg
 
 
-def optimize_fuel_allocation_module(df_prices, df_ghg, baseline_cost, baseline_ghg, LHV, RHO, freight_volume, fuel_consumption, mode):
+def optimize_fuel_allocation_module(df_prices, df_ghg, baseline_cost, baseline_ghg, LHV, RHO, freight_volume, fuel_consumption, max_cost_increase, mode, mode_fuel_options):
     """
     Optimize allocation of freight volume to minimize sector-wide emissions
     while keeping costs under a user-specified limit.
@@ -40,16 +53,225 @@ def optimize_fuel_allocation_module(df_prices, df_ghg, baseline_cost, baseline_g
         RHO (dict): Density of fuels.
         freight_volume (dict): Freight volume split.
         fuel_consumption (dict): Fuel consumption profile (in G/mile).
+        max_cost_increase (float): Upper limit on total system cost increase (%).
         mode (str): Transportation mode ("Highway", "Rail", "Maritime").
+        mode_fuel_options (dict): Fuels to consider for allocation in each mode.
 
     Returns:
         dict: Dictionary containing optimized allocations, GHG, and costs for each scenario.
     """
-     # Call the Multi Objective optimization module 
-    MultiObjOutputs = MultiObjOpt_module.Run(df_prices, df_ghg, baseline_cost, baseline_ghg, LHV, RHO, freight_volume, fuel_consumption, mode)
+     # Call the Multi Objective optimization module
+    MultiObjOutputs = MultiObjOpt_module.Run(df_prices, df_ghg, baseline_cost, baseline_ghg, LHV, RHO, freight_volume, fuel_consumption, max_cost_increase, mode, mode_fuel_options)
 
     # The output from MultiObjOpt includes prices and emissions for each scenario for highway, rail, and maritime
     results = MultiObjOutputs
-    
+
     # Return a tuple of all results
-    return results
\ No newline at end of file
+    return results
+
+
+def results_to_frame(mode_results, df_prices=None):
+    """
+    Flatten optimization results into one row per mode and scenario.
+
+    Args:
+        mode_results (dict): Mode -> results dictionary, as returned by OptimizationPipeline.run_all.
+        df_prices (pd.DataFrame): Optional fuel price data whose GCAM factor columns are added to each scenario.
+
+    Returns:
+        pd.DataFrame: Mode, Scenario, Status ("solved" or "failed"), Percent GHG Change, Percent Cost Change,
+                      Allocation (fuel) and GCAM factor columns.
+    """
+    scenarios_data = []
+    for mode, results in mode_results.items():
+        for scenario, result in results.items():
+            solved = result["allocations"] is not None
+            row = {
+                "Mode": mode,
+                "Scenario": scenario,
+                "Status": "solved" if solved else "failed",
+                "Percent GHG Change": float(result["percent_ghg"]) if solved else None,
+                "Percent Cost Change": float(result["percent_cost"]) if solved else None
+            }
+            # Add individual allocation values (e.g., 'Diesel', 'Hydrogen', etc.) as columns
+            for fuel, allocation in (result["allocations"] or {}).items():
+                row[f"Allocation ({fuel})"] = allocation
+            scenarios_data.append(row)
+
+    results_df = pd.DataFrame(scenarios_data, columns=None if scenarios_data else RESULT_COLUMNS)
+    if df_prices is not None and not results_df.empty:
+        factor_columns = [col for col in FACTOR_COLUMNS if col in df_prices.columns]
+        factors = df_prices[['scenario'] + factor_columns].drop_duplicates('scenario').rename(columns={'scenario': 'Scenario'})
+        results_df = results_df.merge(factors, on="Scenario", how="left")
+    return results_df
+
+
+class OptimizationPipeline:
+    """
+    Owns the loaded price/emissions data together with the baseline, coefficient and result
+    caches, so scripts, the Dashboard and notebooks can share warm state between runs.
+    solve_stats maps each (mode, max_cost_increase) run to its scenario deduplication counts.
+
+    Args:
+        df_prices (pd.DataFrame): Fuel price data.
+        df_ghg (pd.DataFrame): Fuel emissions data.
+        LHV (dict): Lower heating values of fuels.
+        RHO (dict): Density of fuels.
+        fuel_consumption (dict): Fuel consumption profile (in G/mile).
+        freight_volume (dict): Freight volume split.
+        mode_fuel_options (dict): Fuels to consider for allocation in each mode.
+    """
+
+    def __init__(self, df_prices, df_ghg, LHV, RHO, fuel_consumption, freight_volume, mode_fuel_options):
+        self.df_prices = df_prices
+        self.df_ghg = df_ghg
+        self.LHV = LHV
+        self.RHO = RHO
+        self.fuel_consumption = fuel_consumption
+        self.freight_volume = freight_volume
+        self.mode_fuel_options = mode_fuel_options
+        self._baseline = None
+        self._coefficients = {}
+        self._results = {}
+        self.solve_stats = {}
+
+    @classmethod
+    def from_csv(cls, prices_path, ghg_path, LHV, RHO, fuel_consumption, freight_volume, mode_fuel_options):
+        """
+        Build a pipeline from the GCAM price and emissions CSV exports.
+        """
+        return cls(pd.read_csv(prices_path), pd.read_csv(ghg_path), LHV, RHO, fuel_consumption, freight_volume, mode_fuel_options)
+
+    def baseline(self):
+        """
+        Baseline costs and GHG emissions of petroleum diesel, computed once.
+
+        Returns:
+            dict: Mode -> (baseline_cost, baseline_ghg) dictionaries keyed by scenario.
+        """
+        if self._baseline is None:
+            (highway_base_prices, rail_base_prices, maritime_base_prices,
+             highway_base_ghg, rail_base_ghg, maritime_base_ghg) = calculate_baseline_module(
+                self.df_prices, self.df_ghg, self.freight_volume, self.LHV, self.RHO, self.fuel_consumption)
+            self._baseline = {
+                "Highway": (highway_base_prices, highway_base_ghg),
+                "Rail": (rail_base_prices, rail_base_ghg),
+                "Maritime": (maritime_base_prices, maritime_base_ghg),
+            }
+        return self._baseline
+
+    def coefficients(self, mode):
+        """
+        Per-scenario cost and GHG coefficients of a mode, computed once.
+        """
+        if mode not in self._coefficients:
+            self._coefficients[mode] = MultiObjOpt_module.build_coefficients(
+                self.df_prices, self.df_ghg, self.LHV, self.RHO, self.freight_volume,
+                self.fuel_consumption, mode, self.mode_fuel_options)
+        return self._coefficients[mode]
+
+    def run(self, mode, max_cost_increase):
+        """
+        Optimized allocations of a mode for a cost cap; repeated calls reuse the cached results.
+
+        Args:
+            mode (str): Transportation mode ("Highway", "Rail", "Maritime").
+            max_cost_increase (float): Upper limit on total system cost increase (%).
+
+        Returns:
+            dict: Dictionary containing optimized allocations, GHG, and costs for each scenario.
+        """
+        key = (mode, max_cost_increase)
+        if key not in self._results:
+            baseline_cost, baseline_ghg = self.baseline()[mode]
+            self.solve_stats[key] = {}
+            self._results[key] = MultiObjOpt_module.solve_coefficients(
+                self.coefficients(mode), baseline_cost, baseline_ghg, max_cost_increase, self.solve_stats[key])
+        return self._results[key]
+
+    def run_milp(self, mode, max_cost_increase, **milp_options):
+        """
+        Mixed-integer allocations of a mode (see MultiObjMILP_module.solve_coefficients for the options),
+        reusing the cached baseline and coefficients; repeated calls with the same options reuse the cached results.
+
+        Returns:
+            dict: Dictionary containing optimized allocations, adopted fuels, GHG, costs and solver status for each scenario.
+        """
+        key = ("milp", mode, max_cost_increase, repr(sorted(milp_options.items())))
+        if key not in self._results:
+            baseline_cost, baseline_ghg = self.baseline()[mode]
+            self.solve_stats[key] = {}
+            self._results[key] = MultiObjMILP_module.solve_coefficients(
+                self.coefficients(mode), baseline_cost, baseline_ghg, max_cost_increase, stats=self.solve_stats[key], **milp_options)
+        return self._results[key]
+
+    def run_pareto(self, mode, time_limit=10):
+        """
+        Cost-vs-GHG trade-off curves of every scenario of a mode (see ParetoOpt_module.solve_coefficients),
+        reusing the cached baseline and coefficients.
+
+        Returns:
+            dict: Dictionary containing the trade-off curve vertices of each scenario.
+        """
+        key = ("pareto", mode, time_limit)
+        if key not in self._results:
+            baseline_cost, baseline_ghg = self.baseline()[mode]
+            self._results[key] = ParetoOpt_module.solve_coefficients(
+                self.coefficients(mode), baseline_cost, baseline_ghg, time_limit)
+        return self._results[key]
+
+    def run_all(self, max_cost_increase, modes=MODES):
+        """
+        Optimized allocations of every mode for a cost cap.
+
+        Returns:
+            dict: Mode -> results dictionary as returned by run.
+        """
+        return {mode: self.run(mode, max_cost_increase) for mode in modes}
+
+
+def run_streaming(prices_path, ghg_path, LHV, RHO, fuel_consumption, freight_volume, mode_fuel_options, max_cost_increase,
+                  modes=MODES, scenarios=None, chunksize=100000, engine="pandas"):
+    """
+    Optimize every scenario of GCAM exports too large to load at once. The files are streamed in chunks
+    keeping only 2050 rows of the selected fuels, and each scenario is optimized as soon as it has been read.
+    Scenarios without emissions data or a computable baseline are yielded as failed for every mode.
+
+    Args:
+        prices_path (str): Path of the fuel price CSV export.
+        ghg_path (str): Path of the fuel emissions CSV export.
+        LHV (dict): Lower heating values of fuels.
+        RHO (dict): Density of fuels.
+        fuel_consumption (dict): Fuel consumption profile (in G/mile).
+        freight_volume (dict): Freight volume split.
+        mode_fuel_options (dict): Fuels to consider for allocation in each mode.
+        max_cost_increase (float): Upper limit on total system cost increase (%).
+        modes (list): Transportation modes to optimize.
+        scenarios (iterable): Scenarios to keep, or None for all scenarios.
+        chunksize (int): Number of rows read at a time.
+        engine (str): "pandas" or "pyarrow", see streaming_module.read_filtered.
+
+    Returns:
+        generator: (scenario, results) tuples, where results maps each mode to the scenario's result dictionary.
+    """
+    # The baseline always needs petroleum diesel, even when it is not an allocation option
+    fuels = {'petroleum diesel'}.union(*(mode_fuel_options[mode] for mode in modes))
+
+    for scenario, df_prices, df_ghg in streaming_module.iter_scenario_pairs(
+            prices_path, ghg_path, years=(2050,), fuels=fuels, scenarios=scenarios, chunksize=chunksize, engine=engine):
+        failed = {"allocations": None, "percent_ghg": None, "percent_cost": None}
+
+        # A scenario without emissions data, or whose baseline cannot be computed, fails on its own
+        # instead of stopping the rest of the ensemble
+        if df_ghg.empty:
+            print(f"Optimization failed for scenario: {scenario} (no emissions data)")
+            yield scenario, {mode: dict(failed) for mode in modes}
+            continue
+        pipeline = OptimizationPipeline(df_prices, df_ghg, LHV, RHO, fuel_consumption, freight_volume, mode_fuel_options)
+        try:
+            results = pipeline.run_all(max_cost_increase, modes)
+        except ValueError as e:
+            print(f"Optimization failed for scenario: {scenario} ({e})")
+            yield scenario, {mode: dict(failed) for mode in modes}
+            continue
+        yield scenario, {mode: results[mode].get(scenario, dict(failed)) for mode in modes}
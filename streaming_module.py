@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow.dataset as ds
+except ImportError:  # pyarrow is optional; the pandas chunked reader is used without it
+    ds = None
+
+# Columns needed by BaselineObj.Run and MultiObjOpt_module.Run
+PRICE_COLUMNS = ['scenario', 'Biomass Supply', 'reporting_fuel', 'year', 'price_USDperGJ']
+GHG_COLUMNS = ['scenario', 'fuel', 'year', 'kgCO2e_GJ']
+
+
+def read_filtered(path, columns, fuel_column, years=(2050,), fuels=None, scenarios=None, chunksize=100000, engine="pandas"):
+    """
+    Read a GCAM export in chunks, keeping only the requested columns and the rows matching the
+    year/fuel/scenario filters, so peak memory is bounded by the chunk size rather than the file size.
+
+    Args:
+        path (str): Path of the CSV export.
+        columns (list): Columns to keep.
+        fuel_column (str): Name of the fuel column ('reporting_fuel' for prices, 'fuel' for emissions).
+        years (iterable): Years to keep, or None for all years.
+        fuels (iterable): Fuels to keep, or None for all fuels.
+        scenarios (iterable): Scenarios to keep, or None for all scenarios.
+        chunksize (int): Number of rows read at a time.
+        engine (str): "pandas" for chunked pd.read_csv, "pyarrow" for predicate pushdown with pyarrow datasets.
+
+    Returns:
+        generator: Filtered pd.DataFrame chunks in file order.
+    """
+    if engine == "pyarrow":
+        if ds is None:
+            raise ImportError("engine='pyarrow' requires the pyarrow package.")
+        expression = None
+        for column, values in (('year', years), (fuel_column, fuels), ('scenario', scenarios)):
+            if values is not None:
+                condition = ds.field(column).isin(list(values))
+                expression = condition if expression is None else expression & condition
+        dataset = ds.dataset(path, format="csv")
+        for batch in dataset.to_batches(columns=columns, filter=expression, batch_size=chunksize):
+            if batch.num_rows:
+                yield batch.to_pandas()
+    elif engine == "pandas":
+        for chunk in pd.read_csv(path, usecols=columns, chunksize=chunksize):
+            mask = pd.Series(True, index=chunk.index)
+            if years is not None:
+                mask &= chunk['year'].isin(list(years))
+            if fuels is not None:
+                mask &= chunk[fuel_column].isin(list(fuels))
+            if scenarios is not None:
+                mask &= chunk['scenario'].isin(list(scenarios))
+            if mask.any():
+                yield chunk[mask]
+    else:
+        raise ValueError(f"Unknown engine: {engine}. Use 'pandas' or 'pyarrow'.")
+
+
+def iter_scenarios(chunks):
+    """
+    Regroup filtered chunks into one DataFrame per scenario, yielding each scenario as soon as the
+    rows of the next one start. GCAM exports list the rows of a scenario contiguously, which is required here.
+
+    Args:
+        chunks (iterable): Filtered pd.DataFrame chunks, e.g. from read_filtered.
+
+    Returns:
+        generator: (scenario, pd.DataFrame) tuples.
+    """
+    completed = set()
+    current, pending = None, []
+    for chunk in chunks:
+        # Split the chunk wherever the scenario changes
+        scenario_ids = chunk['scenario'].to_numpy()
+        starts = np.concatenate(([0], np.flatnonzero(scenario_ids[1:] != scenario_ids[:-1]) + 1))
+        for start, stop in zip(starts, np.append(starts[1:], len(scenario_ids))):
+            scenario = scenario_ids[start]
+            if scenario != current:
+                if current is not None:
+                    completed.add(current)
+                    yield current, pd.concat(pending)
+                if scenario in completed:
+                    raise ValueError(f"Rows of scenario {scenario} are not contiguous; sort the input by scenario first.")
+                current, pending = scenario, []
+            pending.append(chunk.iloc[start:stop])
+    if current is not None:
+        yield current, pd.concat(pending)
+
+
+def iter_scenario_pairs(prices_path, ghg_path, years=(2050,), fuels=None, scenarios=None, chunksize=100000, engine="pandas",
+                        price_columns=PRICE_COLUMNS, ghg_columns=GHG_COLUMNS):
+    """
+    Stream the price and emissions exports side by side and yield the data of each scenario once it is
+    complete in both files. Scenarios missing from the emissions file are yielded with an empty emissions frame.
+
+    Args:
+        prices_path (str): Path of the fuel price CSV export.
+        ghg_path (str): Path of the fuel emissions CSV export.
+        years, fuels, scenarios, chunksize, engine: See read_filtered.
+        price_columns (list): Price columns to keep (add GCAM factor columns here if needed downstream).
+        ghg_columns (list): Emissions columns to keep.
+
+    Returns:
+        generator: (scenario, df_prices, df_ghg) tuples.
+    """
+    price_stream = iter_scenarios(read_filtered(prices_path, price_columns, 'reporting_fuel', years, fuels, scenarios, chunksize, engine))
+    ghg_stream = iter_scenarios(read_filtered(ghg_path, ghg_columns, 'fuel', years, fuels, scenarios, chunksize, engine))
+
+    # Scenarios finished in one file but not yet in the other; both stay small when the files share an order
+    pending_prices, pending_ghg = {}, {}
+    ghg_done = False
+    for scenario, df_prices in price_stream:
+        pending_prices[scenario] = df_prices
+        while scenario not in pending_ghg and not ghg_done:
+            try:
+                ghg_scenario, df_ghg = next(ghg_stream)
+                pending_ghg[ghg_scenario] = df_ghg
+            except StopIteration:
+                ghg_done = True
+        for ready in [s for s in pending_prices if s in pending_ghg or ghg_done]:
+            df_ghg = pending_ghg.pop(ready, pd.DataFrame(columns=ghg_columns))
+            yield ready, pending_prices.pop(ready), df_ghg